@@ -1,7 +1,16 @@
+import html
+import json
+import os
+import time
+from collections import deque
+
 import gi
 gi.require_version('Gtk', '3.0')
 gi.require_version('WebKit2', '4.0')
-from gi.repository import Gtk, WebKit2
+from gi.repository import Gtk, WebKit2, Gio, GLib
+
+PERF_HISTORY_SIZE = 50  # Number of page loads kept for reptile://perf
+PERF_LOG_PATH = os.environ.get("REPTILE_PERF_LOG")  # Optional JSON lines log of page loads
 
 class SimpleBrowser(Gtk.Window):
     def __init__(self):
@@ -14,8 +23,13 @@ class SimpleBrowser(Gtk.Window):
         self.vbox = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
         self.add(self.vbox)
 
+        # Page load timings shown on reptile://perf
+        self.perf_history = deque(maxlen=PERF_HISTORY_SIZE)
+        self.current_load = None
+
         # Create a WebView widget
         self.webview = WebKit2.WebView()
+        self.webview.get_context().register_uri_scheme("reptile", self.on_reptile_scheme_request)
         self.homepage_url = "https://juanvel4000.serv00.net/reptile/"  # Set homepage URL
         self.webview.load_uri(self.homepage_url)  # Default home page
         self.vbox.pack_start(self.webview, True, True, 0)
@@ -60,6 +74,11 @@ class SimpleBrowser(Gtk.Window):
         help_item.connect("activate", self.on_help_clicked)
         self.menu.append(help_item)
 
+        # Performance menu item
+        perf_item = Gtk.MenuItem(label="Performance")
+        perf_item.connect("activate", self.on_perf_clicked)
+        self.menu.append(perf_item)
+
         # Exit menu item
         exit_item = Gtk.MenuItem(label="Exit")
         exit_item.connect("activate", Gtk.main_quit)
@@ -75,6 +94,13 @@ class SimpleBrowser(Gtk.Window):
 
         # Update URL entry and window title when the page changes
         self.webview.connect("load_changed", self.on_load_changed)
+        self.webview.connect("load-failed", self.on_load_failed)
+
+        # Update the progress bar with WebKit's estimate while loading
+        self.webview.connect("notify::estimated-load-progress", self.on_progress_changed)
+
+        # Count resources and bytes for the current page load
+        self.webview.connect("resource-load-started", self.on_resource_load_started)
 
         # Connect the title-changed event to update window title
         self.webview.connect("notify::title", self.on_title_changed)
@@ -83,6 +109,8 @@ class SimpleBrowser(Gtk.Window):
         self.show_all()
 
     def on_load_changed(self, webview, load_event):
+        self.record_load_event(webview, load_event)
+
         if load_event == WebKit2.LoadEvent.COMMITTED:
             # Get the current URI
             current_uri = webview.get_uri()
@@ -92,7 +120,6 @@ class SimpleBrowser(Gtk.Window):
             else:
                 # Update URL entry with the current URI
                 self.url_entry.set_text(current_uri)
-            self.progress_bar.set_fraction(0.0)  # Reset the progress bar
             self.progress_bar.show()  # Show progress bar
 
         elif load_event == WebKit2.LoadEvent.FINISHED:
@@ -101,9 +128,112 @@ class SimpleBrowser(Gtk.Window):
             self.progress_bar.hide()  # Hide the progress bar after loading is complete
 
         elif load_event == WebKit2.LoadEvent.STARTED:
+            self.progress_bar.set_fraction(0.0)  # Reset the progress bar
             self.progress_bar.set_text("Loading...")  # Update text to "Loading..."
             self.progress_bar.show()  # Show the progress bar when loading starts
 
+    def on_progress_changed(self, webview, param):
+        progress = webview.get_estimated_load_progress()
+        self.progress_bar.set_fraction(progress)
+        if progress < 1.0:
+            self.progress_bar.set_text(f"Loading... {int(progress * 100)}%")
+
+    def record_load_event(self, webview, load_event):
+        # Keep track of how long each navigation takes, internal pages are skipped
+        now = time.monotonic()
+        if load_event == WebKit2.LoadEvent.STARTED:
+            uri = webview.get_uri() or ""
+            if uri.startswith("reptile://"):
+                self.current_load = None
+                return
+            self.current_load = {
+                "uri": uri,
+                "started": time.time(),
+                "start_time": now,
+                "committed_ms": None,
+                "finished_ms": None,
+                "resources": 0,
+                "bytes": 0,
+                "error": None,
+            }
+        elif self.current_load is None:
+            return
+        elif load_event == WebKit2.LoadEvent.COMMITTED:
+            # The URI may have changed because of redirects
+            self.current_load["uri"] = webview.get_uri() or self.current_load["uri"]
+            self.current_load["committed_ms"] = (now - self.current_load["start_time"]) * 1000
+        elif load_event == WebKit2.LoadEvent.FINISHED:
+            record = self.current_load
+            self.current_load = None
+            record["finished_ms"] = (now - record.pop("start_time")) * 1000
+            self.perf_history.append(record)
+            self.write_perf_log(record)
+
+    def on_load_failed(self, webview, load_event, failing_uri, error):
+        if self.current_load is not None:
+            self.current_load["error"] = error.message
+        return False  # Let WebKit show its error page
+
+    def on_resource_load_started(self, webview, resource, request):
+        record = self.current_load
+        if record is None:
+            return
+        record["resources"] += 1
+
+        def on_received_data(resource, data_length):
+            record["bytes"] += data_length
+
+        resource.connect("received-data", on_received_data)
+
+    def write_perf_log(self, record):
+        if not PERF_LOG_PATH:
+            return
+        try:
+            with open(PERF_LOG_PATH, "a") as log_file:
+                log_file.write(json.dumps(record) + "\n")
+        except OSError as e:
+            print(f"Could not write performance log: {e}")
+
+    def render_perf_page(self):
+        rows = ""
+        for record in reversed(self.perf_history):
+            committed = f"{record['committed_ms']:.0f}" if record["committed_ms"] is not None else "-"
+            rows += (
+                "<tr>"
+                f"<td>{time.strftime('%H:%M:%S', time.localtime(record['started']))}</td>"
+                f"<td>{html.escape(record['uri'])}</td>"
+                f"<td>{committed}</td>"
+                f"<td>{record['finished_ms']:.0f}</td>"
+                f"<td>{record['resources']}</td>"
+                f"<td>{record['bytes'] / 1024:.1f}</td>"
+                f"<td>{html.escape(record['error'] or '')}</td>"
+                "</tr>"
+            )
+        if self.perf_history:
+            average = sum(r["finished_ms"] for r in self.perf_history) / len(self.perf_history)
+            summary = f"{len(self.perf_history)} page loads, average {average:.0f} ms"
+        else:
+            summary = "No page loads recorded yet"
+        return (
+            "<html><head><title>Performance</title></head><body>"
+            "<h1>Reptile Performance</h1>"
+            f"<p>{summary}</p>"
+            "<table border='1' cellpadding='4'>"
+            "<tr><th>Started</th><th>URL</th><th>Committed (ms)</th><th>Finished (ms)</th>"
+            "<th>Resources</th><th>Received (KiB)</th><th>Error</th></tr>"
+            f"{rows}</table></body></html>"
+        )
+
+    def on_reptile_scheme_request(self, request):
+        # Serve Reptile's internal pages
+        if request.get_uri().rstrip("/") == "reptile://perf":
+            page = self.render_perf_page()
+        else:
+            page = "<html><body><h1>Page not found</h1></body></html>"
+        data = page.encode("utf-8")
+        stream = Gio.MemoryInputStream.new_from_bytes(GLib.Bytes.new(data))
+        request.finish(stream, len(data), "text/html")
+
     def on_title_changed(self, webview, param):
         # Get the current title and set the window title as "(Page Name) - Reptile"
         title = webview.get_title() if webview.get_title() else "Reptile"
@@ -119,6 +249,9 @@ class SimpleBrowser(Gtk.Window):
         dialog.run()
         dialog.destroy()
 
+    def on_perf_clicked(self, menu_item):
+        self.webview.load_uri("reptile://perf")
+
     def on_menu_button_clicked(self, button):
         # Show the menu below the button
         self.menu.popup(None, None, None, button, 0, Gtk.get_current_event_time())
@@ -140,7 +273,9 @@ class SimpleBrowser(Gtk.Window):
     def on_url_activate(self, entry):
         uri = entry.get_text()
         if uri == "reptile://homepage":
-            self.webview.load_uri(self.homepage_url)  # Load the actual homepage
+            uri = self.homepage_url  # Load the actual homepage
+        elif uri.startswith("reptile://"):
+            pass  # Internal pages are served by on_reptile_scheme_request
         elif not (uri.startswith("http://") or uri.startswith("https://")):
             uri = "http://" + uri  # Prepend "http://" if no scheme is provided
         self.webview.load_uri(uri)